@@ -0,0 +1,57 @@
+import numba
+import numpy as np
+
+
+@numba.njit(cache=True)
+def shifted_cumsum(
+    flags: np.ndarray,
+    true_amt: float,
+    false_amt: float,
+    first_amt: float,
+    out: np.ndarray,
+) -> np.ndarray:
+    """
+    Cumulative sum of amounts chosen by the previous element of a boolean array.
+
+    Args:
+        flags (np.ndarray): Boolean array.
+        true_amt (float): Amount added after an element that is True.
+        false_amt (float): Amount added after an element that is False.
+        first_amt (float): Amount for the first element, which has no previous element.
+        out (np.ndarray): Array of the same length as flags to write the result to.
+
+    Returns:
+        np.ndarray: out, filled with the cumulative sum.
+    """
+    if len(flags) == 0:
+        return out
+
+    total = first_amt
+    out[0] = total
+    for i in range(1, len(flags)):
+        total += true_amt if flags[i - 1] else false_amt
+        out[i] = total
+    return out
+
+
+@numba.njit(cache=True)
+def bin_events(
+    event_times: np.ndarray, sampling_interval: float, out: np.ndarray
+) -> np.ndarray:
+    """
+    Count events falling in each time step. Events outside the time steps are dropped.
+
+    Args:
+        event_times (np.ndarray): Event times in float seconds.
+        sampling_interval (float): Duration of each time step in seconds.
+        out (np.ndarray): Zeroed array with one element per time step to add the counts to.
+
+    Returns:
+        np.ndarray: out, filled with the event counts.
+    """
+    n_timesteps = len(out)
+    for t in event_times:
+        idx = np.floor(t / sampling_interval)
+        if idx >= 0 and idx < n_timesteps:
+            out[int(idx)] += 1
+    return out
@@ -11,6 +11,8 @@ def demarcate_trials(
     df_trials_end_col: str = "reward_collection_time",
     df_trials_idx_col: str = "trial_idx",
     created_trial_idx_col: str | None = None,
+    presorted_ts: bool = False,
+    presorted_trials: bool = False,
 ) -> pd.DataFrame:
     """
     Demarcates trials for time series such as calcium or motion data.
@@ -22,47 +24,39 @@ def demarcate_trials(
         df_trials_start_col (str, optional): Start time column in df_trials. Defaults to "start_time".
         df_trials_end_col (str, optional): End time column in df_trials. Defaults to "reward_collection_time".
         df_trials_idx_col (str, optional): Trial index column in df_trials. Defaults to value of "trial_idx".
+        created_trial_idx_col (str, optional): Trial index column name to create. Defaults to value of df_trials_idx_col.
+        presorted_ts (bool, optional): Set to True if df_ts is already sorted by time to skip sorting it. Defaults to False.
+        presorted_trials (bool, optional): Set to True if df_trials is already sorted by start time to skip sorting it. Defaults to False.
 
     Returns:
         pd.DataFrame: df_ts with trial_id column
     """
     created_trial_idx_col = created_trial_idx_col or df_trials_idx_col
 
-    df_ts = df_ts.sort_values(by=df_ts_time_col)
-    df_trials = df_trials.sort_values(by=df_trials_start_col)
+    if presorted_ts:
+        # shallow copy so the created column is not added to the caller's dataframe
+        df_ts = df_ts.copy(deep=False)
+    else:
+        df_ts = df_ts.sort_values(by=df_ts_time_col, kind="stable", ignore_index=True)
+    if not presorted_trials:
+        df_trials = df_trials.sort_values(
+            by=df_trials_start_col, kind="stable", ignore_index=True
+        )
 
-    # Creates a df with trial_id column demarcing all rows from current current trial start to next trial start with trial idx
-    merged_start = pd.merge_asof(
-        df_ts,
-        df_trials[[df_trials_start_col, df_trials_idx_col]],
-        left_on=df_ts_time_col,
-        right_on=df_trials_start_col,
-        direction="backward",
-    )
+    times = df_ts[df_ts_time_col].to_numpy()
+    starts = df_trials[df_trials_start_col].to_numpy()
+    ends = df_trials[df_trials_end_col].to_numpy()
+    trial_idx = df_trials[df_trials_idx_col].to_numpy()
 
-    # Creates a df with trial_id column demarcing all rows from current current end to previous trial start with trial idx
-    max_time = max(df_ts[df_ts_time_col].max(), df_trials[df_trials_end_col].max())
-    df_ts["inverted_time"] = max_time - df_ts[df_ts_time_col]
-    df_trials["inverted_end_time"] = max_time - df_trials[df_trials_end_col]
-    merged_stop = pd.merge_asof(
-        df_ts.iloc[::-1],
-        df_trials[[df_trials_idx_col, "inverted_end_time"]].sort_values(
-            by="inverted_end_time"
-        ),
-        left_on="inverted_time",
-        right_on="inverted_end_time",
-        direction="backward",
-    )
-    merged_stop = merged_stop.sort_values(by=df_ts_time_col).reset_index(drop=True)
+    # Position of the latest trial starting at or before each time point
+    pos = np.searchsorted(starts, times, side="right") - 1
 
-    # Create final trial_id column by taking rows where trial_id is the same in both dfs
-    df_ts[created_trial_idx_col] = merged_start[df_trials_idx_col].where(
-        merged_start[df_trials_idx_col] == merged_stop[df_trials_idx_col], np.nan
-    )
-
-    # drop the temperary time columns
-    df_ts.drop(columns=["inverted_time"], inplace=True)
-    df_trials.drop(columns=["inverted_end_time"], inplace=True)
+    # Keep the trial idx only for rows that fall before that trial's end
+    in_trial = pos >= 0
+    in_trial[in_trial] = times[in_trial] <= ends[pos[in_trial]]
+    created_trial_idx = np.full(len(times), np.nan)
+    created_trial_idx[in_trial] = trial_idx[pos[in_trial]]
+    df_ts[created_trial_idx_col] = created_trial_idx
 
     # place time and trial_id columns at the front of the dataframe
     first_cols = [df_ts_time_col, created_trial_idx_col]
@@ -71,7 +65,7 @@ def demarcate_trials(
         for col in df_ts.columns
         if col not in [df_ts_time_col, created_trial_idx_col]
     ]
-    df_ts = df_ts[first_cols + other_cols]
+    df_ts = df_ts.reindex(columns=first_cols + other_cols)
 
     return df_ts
 
@@ -126,23 +120,21 @@ def demarcate_latency_from_event(
         round_precision=round_precision,
     )
     if adjust_backward:
-        dt = df_aligned[created_latency_col].diff().median()
-        df_aligned[created_latency_col] = df_aligned[created_latency_col] - dt
-        df_aligned[created_latency_col] = df_aligned[created_latency_col].round(
-            round_precision
-        )
+        latency = df_aligned[created_latency_col].to_numpy()
+        dt = np.nanmedian(np.diff(latency))
+        df_aligned[created_latency_col] = np.round(latency - dt, round_precision)
     if created_event_idx_col is None:
-        df_aligned = df_aligned.drop(columns=temp_event_idx_col)
+        del df_aligned[temp_event_idx_col]
     else:
-        df_aligned = df_aligned.rename(
-            columns={temp_event_idx_col: created_event_idx_col}
+        df_aligned.rename(
+            columns={temp_event_idx_col: created_event_idx_col}, inplace=True
         )
 
     # reorder columns
     first_cols = [df_ts_time_col, created_latency_col]
     if created_event_idx_col is not None:
-        first_cols.append(temp_event_idx_col)
+        first_cols.append(created_event_idx_col)
     other_cols = [c for c in df_aligned.columns if c not in first_cols]
-    df_aligned = df_aligned[first_cols + other_cols]
+    df_aligned = df_aligned.reindex(columns=first_cols + other_cols)
 
     return df_aligned
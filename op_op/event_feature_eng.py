@@ -1,5 +1,8 @@
 import pandas as pd
 import numpy as np
+import numpy.typing as npt
+
+from op_op._kernels import shifted_cumsum
 
 
 def num_prev_trials(
@@ -15,14 +18,14 @@ def num_prev_trials(
     Returns:
         np.ndarray: An array containing the number of previous trials for each event.
     """
-    trial_idx = np.arange(len(df_events))
-
     if in_block:
-        for block_type in df_events[block_type_col].unique():
-            idx = df_events[block_type_col] == block_type
-            trial_idx[idx] = trial_idx[idx] - trial_idx[idx].min()
+        return (
+            df_events.groupby(block_type_col, sort=False, observed=True)
+            .cumcount()
+            .to_numpy(dtype=np.int32)
+        )
 
-    return trial_idx
+    return np.arange(len(df_events), dtype=np.int32)
 
 
 def cumulative_reward(
@@ -30,6 +33,7 @@ def cumulative_reward(
     large_choice_col: str = "chose_large",
     large_reward_amt: float = 1.0,
     small_reward_amt: float = 0.0,
+    dtype: npt.DTypeLike = np.float32,
 ) -> np.ndarray:
     """
     Returns the cumulative reward up to each event.
@@ -40,16 +44,21 @@ def cumulative_reward(
         large_reward_amt (float, optional): The reward amount for a large choice. Defaults to 1.0.
         small_reward_amt (float, optional): The reward amount for a small choice. Defaults to 0.0.
         window (int, optional): The size of the window to use for smoothing. Defaults to entire session.
+        dtype (npt.DTypeLike, optional): The dtype of the returned array. Defaults to np.float32.
 
     Returns:
         np.ndarray: An array containing the cumulative reward up to each event.
     """
-    reward = (
-        df_events[large_choice_col]
-        .shift(1)
-        .map({True: large_reward_amt, False: small_reward_amt, np.nan: 0.0})
+    chose_large = df_events[large_choice_col].to_numpy(dtype=bool)
+
+    # reward from the previous trial, zero on the first trial
+    return shifted_cumsum(
+        chose_large,
+        large_reward_amt,
+        small_reward_amt,
+        0.0,
+        np.empty(len(chose_large), dtype=dtype),
     )
-    return reward.cumsum()
 
 
 def reward_in_window(
@@ -58,6 +67,7 @@ def reward_in_window(
     large_choice_col: str = "chose_large",
     large_reward_amt: float = 1.0,
     small_reward_amt: float = 0.0,
+    dtype: npt.DTypeLike = np.float32,
 ) -> np.ndarray:
     """
     Returns the cumulative reward in trialing window preceding each event.
@@ -68,20 +78,21 @@ def reward_in_window(
         large_choice_col (str, optional): The column containing the large choice data. Defaults to "chose_large".
         large_reward_amt (float, optional): The reward amount for a large choice. Defaults to 1.0.
         small_reward_amt (float, optional): The reward amount for a small choice. Defaults to 0.0.
+        dtype (npt.DTypeLike, optional): The dtype of the returned array. Defaults to np.float32.
 
     Returns:
         np.ndarray: An array containing the cumulative reward up to each event.
     """
-    rewards = np.where(df_events[large_choice_col], large_reward_amt, small_reward_amt)
+    rewards = np.where(
+        df_events[large_choice_col], large_reward_amt, small_reward_amt
+    ).astype(dtype, copy=False)
 
-    cumulative_rewards = np.convolve(rewards, window_kernel, mode="full")[
+    # leading zero in the kernel shifts the window forward by one trial
+    shifted_kernel = np.concatenate(([0.0], window_kernel)).astype(dtype, copy=False)
+    cumulative_rewards = np.convolve(rewards, shifted_kernel, mode="full")[
         : len(rewards)
     ]
 
-    # shift forward and pad zero
-    cumulative_rewards = np.roll(cumulative_rewards, 1)
-    cumulative_rewards[0] = 0
-
     return cumulative_rewards
 
 
@@ -90,6 +101,7 @@ def cumulative_shock(
     shock_col: str = "was_shocked",
     shock_amt: float = 1.0,
     not_shocked_amt: float = 0.0,
+    dtype: npt.DTypeLike = np.float32,
 ) -> np.ndarray:
     """
     Returns the cumulative shock up to each event.
@@ -99,14 +111,21 @@ def cumulative_shock(
         shock_col (str, optional): The column containing the shock data. Defaults to "shock".
         shock_amt (float, optional): The shock amount. Defaults to 1.0.
         not_shocked_amt (float, optional): The amount for no shock. Defaults to 0.0.
+        dtype (npt.DTypeLike, optional): The dtype of the returned array. Defaults to np.float32.
 
     Returns:
         np.ndarray: An array containing the cumulative shock up to each event.
     """
-    shock = np.where(
-        df_events.shift(1).fillna(0)[shock_col], shock_amt, not_shocked_amt
+    was_shocked = df_events[shock_col].to_numpy(dtype=bool)
+
+    # shock from the previous trial, not shocked on the first trial
+    return shifted_cumsum(
+        was_shocked,
+        shock_amt,
+        not_shocked_amt,
+        not_shocked_amt,
+        np.empty(len(was_shocked), dtype=dtype),
     )
-    return shock.cumsum()
 
 
 def shock_in_window(
@@ -115,6 +134,7 @@ def shock_in_window(
     shock_col: str = "was_shocked",
     shock_amt: float = 1.0,
     not_shocked_amt: float = 0.0,
+    dtype: npt.DTypeLike = np.float32,
 ) -> np.ndarray:
     """
     Returns the cumulative shock in trialing window preceding each event.
@@ -125,17 +145,18 @@ def shock_in_window(
         shock_col (str, optional): The column containing the shock data. Defaults to "shock".
         shock_amt (float, optional): The shock amount. Defaults to 1.0.
         not_shocked_amt (float, optional): The amount for no shock. Defaults to 0.0.
+        dtype (npt.DTypeLike, optional): The dtype of the returned array. Defaults to np.float32.
 
     Returns:
         np.ndarray: An array containing the cumulative shock up to each event.
     """
-    shocks = np.where(df_events[shock_col], shock_amt, not_shocked_amt)
-
-    cumulative_shocks = np.convolve(shocks, window_kernel, mode="full")[: len(shocks)]
+    shocks = np.where(df_events[shock_col], shock_amt, not_shocked_amt).astype(
+        dtype, copy=False
+    )
 
-    # shift forward and pad zero
-    cumulative_shocks = np.roll(cumulative_shocks, 1)
-    cumulative_shocks[0] = 0
+    # leading zero in the kernel shifts the window forward by one trial
+    shifted_kernel = np.concatenate(([0.0], window_kernel)).astype(dtype, copy=False)
+    cumulative_shocks = np.convolve(shocks, shifted_kernel, mode="full")[: len(shocks)]
 
     return cumulative_shocks
 
@@ -158,18 +179,13 @@ def prev_iti_length(
     Returns:
         np.ndarray: An array containing the duration of the ITI preceding each event.
     """
-    iti = np.zeros(len(df_events))
-    iti[0] = np.nan
-    for i, trial_idx in enumerate(df_events[trial_idx_col].unique()):
-        if i == 0:
-            continue
-
-        idx_current_trial = df_events[trial_idx_col] == trial_idx
-        idx_prev_trial = df_events[trial_idx_col] == trial_idx - 1
-        start_time = df_events.loc[idx_current_trial, trial_start_col].values[0]
-        end_time = df_events.loc[idx_prev_trial, trial_env_col].values[0]
+    trials = df_events.groupby(trial_idx_col, observed=True).agg(
+        start=(trial_start_col, "first"), end=(trial_env_col, "first")
+    )
+    # trials are sorted by index, so the shift pairs each with the previous trial
+    iti_per_trial = trials["start"] - trials["end"].shift(1)
 
-        iti[idx_current_trial] = start_time - end_time
+    iti = df_events[trial_idx_col].map(iti_per_trial).to_numpy()
 
     return iti
 
@@ -194,11 +210,23 @@ def event_delay(
     Returns:
         np.ndarray: An array containing the delay between the two events.
     """
-    df = df_events.sort_values(trial_idx_col).shift(shift)
-
-    delay = df[second_event_col] - df[first_event_col]
-
-    return delay.values
+    first_event = df_events[first_event_col].to_numpy(dtype=np.float64)
+    second_event = df_events[second_event_col].to_numpy(dtype=np.float64)
+    order = np.argsort(df_events[trial_idx_col].to_numpy(), kind="stable")
+    delay = second_event[order] - first_event[order]
+
+    # shift along trial order, trials shifted in from outside the session have no delay
+    n = len(delay)
+    shifted_delay = np.full(n, np.nan)
+    if shift >= 0:
+        shifted_delay[shift:] = delay[: max(n - shift, 0)]
+    else:
+        shifted_delay[: max(n + shift, 0)] = delay[-shift:]
+
+    # back to the row order of df_events
+    out = np.empty(n)
+    out[order] = shifted_delay
+    return out
 
 
 def trial_start_delay(
@@ -1,7 +1,13 @@
 import numpy as np
+import numpy.typing as npt
 import scipy.signal
 import pandas as pd
 
+from op_op._kernels import bin_events
+
+# kernels at least this long are convolved with overlap-add FFT instead of directly
+OACONVOLVE_MIN_KERNEL_SIZE = 32
+
 
 def events_to_time_series(
     events_array: np.ndarray | pd.Series,
@@ -9,32 +15,45 @@ def events_to_time_series(
     kernel: np.ndarray | None = None,
     total_duration: float | None = None,
     shift: int = 0,
+    dtype: npt.DTypeLike = np.float32,
 ) -> np.ndarray:
     """
     Convert an array of event times to a time series.
 
+    Each time step holds the number of events falling in it. If total_duration is given, events outside the time series are dropped.
+
     Args:
         events_array (np.ndarray): Array of event times in float seconds.
         sampling_interval (float): Sampling interval of the time series in seconds.
         kernel (np.ndarray): Optional kernel to convolve the time series with.
-        total_duration (float): Total duration of the time series in seconds.
+        total_duration (float): Total duration of the time series in seconds. If None, the time series ends with the time step holding the last event.
         shift (int): Number of samples to shift the time series by. Can be negative for reverse shifts.
+        dtype (npt.DTypeLike): Dtype of the returned time series. Defaults to np.float32.
 
     Returns:
         np.ndarray: Time series of the events.
     """
     if total_duration is None:
-        total_duration = np.max(events_array)
-
-    n_timesteps = int(np.ceil(total_duration / sampling_interval))
-
-    time_series = np.zeros(n_timesteps)
-
-    event_indices = (np.array(events_array) / sampling_interval).astype(int)
-
-    time_series[event_indices] = 1
+        # the last event is binned by flooring, so it needs a time step of its own even
+        # when it falls exactly on a bin edge
+        n_timesteps = int(np.floor(np.max(events_array) / sampling_interval)) + 1
+    else:
+        n_timesteps = int(np.ceil(total_duration / sampling_interval))
+
+    # count events per bin, so repeated events in a bin are not collapsed to one
+    time_series = bin_events(
+        np.asarray(events_array, dtype=np.float64),
+        sampling_interval,
+        np.zeros(n_timesteps, dtype=dtype),
+    )
     if kernel is not None:
-        time_series = scipy.signal.convolve(time_series, kernel, mode="same")
+        kernel = np.asarray(kernel, dtype=dtype)
+        if len(kernel) >= OACONVOLVE_MIN_KERNEL_SIZE:
+            time_series = scipy.signal.oaconvolve(time_series, kernel, mode="same")
+        else:
+            time_series = scipy.signal.convolve(
+                time_series, kernel, mode="same", method="direct"
+            )
 
     time_series = np.roll(time_series, shift)
 
@@ -89,20 +108,31 @@ def events_to_time_series_df(
         pd.DataFrame: Dataframe of time series.
     """
     shifts = np.arange(-num_shifts_backwards, num_shifts_forwards + 1)
-    data_dict = {
-        f"{event_name}_at_{shift}": events_to_time_series(
-            events_array=events_array,
-            sampling_interval=sampling_interval,
-            kernel=kernel,
-            total_duration=total_duration,
-            shift=shift,
-        )
-        for shift in shifts
-    }
-    data_dict[created_time_col] = event_time_series_time(
-        total_duration=total_duration, sampling_interval=sampling_interval
+
+    # bin and convolve once, the shifted series are rolls of this one
+    time_series = events_to_time_series(
+        events_array=events_array,
+        sampling_interval=sampling_interval,
+        kernel=kernel,
+        total_duration=total_duration,
     )
 
-    df = pd.DataFrame(data_dict)
-    df = df[[created_time_col] + [c for c in df.columns if c != created_time_col]]
+    # one row per shift, so each shifted series is written contiguously and the
+    # transposed array becomes a single dataframe block without copying
+    shifted = np.empty((len(shifts), len(time_series)), dtype=time_series.dtype)
+    for i, shift in enumerate(shifts):
+        shifted[i] = np.roll(time_series, shift)
+
+    df = pd.DataFrame(
+        shifted.T,
+        columns=[f"{event_name}_at_{shift}" for shift in shifts],
+        copy=False,
+    )
+    df.insert(
+        0,
+        created_time_col,
+        event_time_series_time(
+            total_duration=total_duration, sampling_interval=sampling_interval
+        ),
+    )
     return df
@@ -1,6 +1,7 @@
 from sklearn.model_selection import BaseCrossValidator
 import numpy as np
 
+
 class GroupTypeKFold(BaseCrossValidator):
     """
     Split grouped data data into k folds, ensuring that each fold contains equal proportions of each group type.
@@ -8,12 +9,16 @@ class GroupTypeKFold(BaseCrossValidator):
     Groups ~ trials.
     Group types ~ trial types.
 
+    Fold assignments for the most recent groups and group_types are cached, so repeated
+    calls to split with the same inputs (e.g. during a grid search) skip recomputing them.
+
     Args:
         n_splits (int): Number of folds. Must be at least 2.
     """
 
     def __init__(self, n_splits=5):
         self.n_splits = n_splits
+        self._cache = None
 
     def split(self, X, y=None, groups=None, group_types=None):
         if groups is None or group_types is None:
@@ -24,25 +29,53 @@ class GroupTypeKFold(BaseCrossValidator):
         groups = np.array(groups)
         group_types = np.array(group_types)
 
-        _ = np.unique(groups)
-        unique_group_types = np.unique(group_types)
+        fold_assignments, test_indices = self._get_folds(groups, group_types)
 
-        fold_assignments = np.full(len(X), -1)
+        for fold, test_idx in enumerate(test_indices):
+            train_idx = np.flatnonzero(fold_assignments != fold)
+            yield train_idx, test_idx
 
-        for group_type in unique_group_types:
-            type_indices = np.flatnonzero(group_types == group_type)
-            type_groups = np.unique(groups[type_indices])
+    def _get_folds(
+        self, groups: np.ndarray, group_types: np.ndarray
+    ) -> tuple[np.ndarray, list[np.ndarray]]:
+        # object arrays hold pointers, so their bytes cannot identify the contents
+        cacheable = not (groups.dtype.hasobject or group_types.dtype.hasobject)
+        if cacheable:
+            key = (
+                self.n_splits,
+                groups.dtype.str,
+                groups.tobytes(),
+                group_types.dtype.str,
+                group_types.tobytes(),
+            )
+            if self._cache is not None and self._cache[0] == key:
+                return self._cache[1]
 
-            fold = 0
-            for group in type_groups:
-                group_indices = np.flatnonzero(groups == group)
-                fold_assignments[group_indices] = fold
-                fold = (fold + 1) % self.n_splits
+        fold_assignments = self._assign_folds(groups, group_types)
+        test_indices = [
+            np.flatnonzero(fold_assignments == fold) for fold in range(self.n_splits)
+        ]
 
-        for fold in range(self.n_splits):
-            test_idx = np.flatnonzero(fold_assignments == fold)
-            train_idx = np.flatnonzero(fold_assignments != fold)
-            yield train_idx, test_idx
+        if cacheable:
+            self._cache = (key, (fold_assignments, test_indices))
+        return fold_assignments, test_indices
+
+    def _assign_folds(self, groups: np.ndarray, group_types: np.ndarray) -> np.ndarray:
+        unique_groups, group_codes = np.unique(groups, return_inverse=True)
+        _, type_codes = np.unique(group_types, return_inverse=True)
+
+        # group type of each unique group
+        group_type_codes = np.empty(len(unique_groups), dtype=type_codes.dtype)
+        group_type_codes[group_codes] = type_codes
+
+        # rank of each group within its group type, assigned to folds round-robin
+        order = np.argsort(group_type_codes, kind="stable")
+        sorted_types = group_type_codes[order]
+        type_starts = np.searchsorted(sorted_types, sorted_types, side="left")
+        group_rank = np.empty(len(unique_groups), dtype=np.intp)
+        group_rank[order] = np.arange(len(unique_groups)) - type_starts
+
+        return (group_rank % self.n_splits)[group_codes]
 
     def get_n_splits(self, X=None, y=None, groups=None, group_types=None):
-        return self.n_splits
\ No newline at end of file
+        return self.n_splits
@@ -1,5 +1,11 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+import os
 from pathlib import Path
 import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset
+import pyarrow.fs
 
 FILENAMES = {
     "events": "events.parquet",
@@ -9,22 +15,35 @@ FILENAMES = {
 }
 
 
+@lru_cache(maxsize=1)
+def _s3_filesystem() -> pyarrow.fs.S3FileSystem:
+    # created once and shared so repeated loads reuse its connection pool
+    return pyarrow.fs.S3FileSystem(region=os.environ.get("S3_BUCKET_REGION"))
+
+
+def _fragment_schema(fragment: pyarrow.dataset.ParquetFileFragment) -> pa.Schema:
+    fragment.ensure_complete_metadata()
+    return fragment.physical_schema
+
+
 def load_session_data(
-    data_dir: Path,
+    data_dir: Path | str,
     mouse_name: str,
     session: str,
     data_type: str,
     add_meta_cols: bool = False,
+    columns: list[str] | None = None,
 ) -> pd.DataFrame:
     """
     Load a single data file for a given mouse and session.
 
     Args:
-        data_dir (Path): Path to the root data directory.
+        data_dir (Path | str): Path to the root data directory. May be an "s3://bucket/prefix" URI.
         mouse_name (str): Name of the mouse. Must be a subdirectory of data_dir.
         session (str): Name of the session. Must be a subdirectory of data_dir/mouse_name.
         data_type (str): Type of data to load. Must be one of "events", "motion", "deconv_calcium", or "raw_calcium".
         add_meta_cols (bool): If True, add columns for mouse_name and session to the DataFrame.
+        columns (list[str] | None): Columns to read from the file. Reads all columns if None.
 
     Returns:
         pd.DataFrame: DataFrame containing the data.
@@ -38,11 +57,19 @@ def load_session_data(
     except KeyError:
         raise ValueError(f"Unknown data type {data_type}.")
 
-    file_path = data_dir / mouse_name / session / filename
-    if not file_path.exists():
-        raise FileNotFoundError(f"File {file_path} does not exist.")
+    if str(data_dir).startswith("s3://"):
+        bucket_path = str(data_dir).removeprefix("s3://").rstrip("/")
+        file_path = f"{bucket_path}/{mouse_name}/{session}/{filename}"
+        df = pd.read_parquet(
+            file_path, columns=columns, engine="pyarrow", filesystem=_s3_filesystem()
+        )
+    else:
+        file_path = Path(data_dir) / mouse_name / session / filename
+        try:
+            df = pd.read_parquet(file_path, columns=columns, engine="pyarrow")
+        except FileNotFoundError:
+            raise FileNotFoundError(f"File {file_path} does not exist.")
 
-    df = pd.read_parquet(file_path)
     if add_meta_cols:
         df["mouse_name"] = mouse_name
         df["session"] = session
@@ -51,16 +78,21 @@ def load_session_data(
 
 
 def load_events(
-    data_dir: Path, mouse_name: str, session: str, add_meta_cols: bool = False
+    data_dir: Path | str,
+    mouse_name: str,
+    session: str,
+    add_meta_cols: bool = False,
+    columns: list[str] | None = None,
 ) -> pd.DataFrame:
     """
     Load the events data for a given mouse and session.
 
     Args:
-        data_dir (Path): Path to the root data directory.
+        data_dir (Path | str): Path to the root data directory. May be an "s3://bucket/prefix" URI.
         mouse_name (str): Name of the mouse. Must be a subdirectory of data_dir.
         session (str): Name of the session. Must be a subdirectory of data_dir/mouse_name.
         add_meta_cols (bool): If True, add columns for mouse_name and session to the DataFrame.
+        columns (list[str] | None): Columns to read from the file. Reads all columns if None.
 
     Returns:
         pd.DataFrame: DataFrame containing the events data.
@@ -68,20 +100,27 @@ def load_events(
     Raises:
         FileNotFoundError: If the file does not exist.
     """
-    return load_session_data(data_dir, mouse_name, session, "events", add_meta_cols)
+    return load_session_data(
+        data_dir, mouse_name, session, "events", add_meta_cols, columns
+    )
 
 
 def load_motion(
-    data_dir: Path, mouse_name: str, session: str, add_meta_cols: bool = False
+    data_dir: Path | str,
+    mouse_name: str,
+    session: str,
+    add_meta_cols: bool = False,
+    columns: list[str] | None = None,
 ) -> pd.DataFrame:
     """
     Load the motion tracking data for a given mouse and session.
 
     Args:
-        data_dir (Path): Path to the root data directory.
+        data_dir (Path | str): Path to the root data directory. May be an "s3://bucket/prefix" URI.
         mouse_name (str): Name of the mouse. Must be a subdirectory of data_dir.
         session (str): Name of the session. Must be a subdirectory of data_dir/mouse_name.
         add_meta_cols (bool): If True, add columns for mouse_name and session to the DataFrame.
+        columns (list[str] | None): Columns to read from the file. Reads all columns if None.
 
     Returns:
         pd.DataFrame: DataFrame containing the motion tracking data.
@@ -89,20 +128,27 @@ def load_motion(
     Raises:
         FileNotFoundError: If the file does not exist.
     """
-    return load_session_data(data_dir, mouse_name, session, "motion", add_meta_cols)
+    return load_session_data(
+        data_dir, mouse_name, session, "motion", add_meta_cols, columns
+    )
 
 
 def load_deconv_calcium(
-    data_dir: Path, mouse_name: str, session: str, add_meta_cols: bool = False
+    data_dir: Path | str,
+    mouse_name: str,
+    session: str,
+    add_meta_cols: bool = False,
+    columns: list[str] | None = None,
 ) -> pd.DataFrame:
     """
     Load the deconvolved calcium data for a given mouse and session.
 
     Args:
-        data_dir (Path): Path to the root data directory.
+        data_dir (Path | str): Path to the root data directory. May be an "s3://bucket/prefix" URI.
         mouse_name (str): Name of the mouse. Must be a subdirectory of data_dir.
         session (str): Name of the session. Must be a subdirectory of data_dir/mouse_name.
         add_meta_cols (bool): If True, add columns for mouse_name and session to the DataFrame.
+        columns (list[str] | None): Columns to read from the file. Reads all columns if None.
 
     Returns:
         pd.DataFrame: DataFrame containing the deconvolved calcium data.
@@ -111,21 +157,26 @@ def load_deconv_calcium(
         FileNotFoundError: If the file does not exist.
     """
     return load_session_data(
-        data_dir, mouse_name, session, "deconv_calcium", add_meta_cols
+        data_dir, mouse_name, session, "deconv_calcium", add_meta_cols, columns
     )
 
 
 def load_raw_calcium(
-    data_dir: Path, mouse_name: str, session: str, add_meta_cols: bool = False
+    data_dir: Path | str,
+    mouse_name: str,
+    session: str,
+    add_meta_cols: bool = False,
+    columns: list[str] | None = None,
 ) -> pd.DataFrame:
     """
     Load the raw calcium data for a given mouse and session.
 
     Args:
-        data_dir (Path): Path to the root data directory.
+        data_dir (Path | str): Path to the root data directory. May be an "s3://bucket/prefix" URI.
         mouse_name (str): Name of the mouse. Must be a subdirectory of data_dir.
         session (str): Name of the session. Must be a subdirectory of data_dir/mouse_name.
         add_meta_cols (bool): If True, add columns for mouse_name and session to the DataFrame.
+        columns (list[str] | None): Columns to read from the file. Reads all columns if None.
 
     Returns:
         pd.DataFrame: DataFrame containing the raw calcium data.
@@ -134,5 +185,87 @@ def load_raw_calcium(
         FileNotFoundError: If the file does not exist.
     """
     return load_session_data(
-        data_dir, mouse_name, session, "raw_calcium", add_meta_cols
+        data_dir, mouse_name, session, "raw_calcium", add_meta_cols, columns
     )
+
+
+def load_all_sessions(
+    data_dir: Path | str,
+    data_type: str,
+    columns: list[str] | None = None,
+) -> pd.DataFrame:
+    """
+    Load one data type for every mouse and session in a single scan.
+
+    Session files are read as one pyarrow dataset, so reading and decompression run
+    across files in parallel. Columns missing from some sessions (e.g. neurons in
+    calcium data) are filled with nulls, and columns whose types differ between sessions
+    are promoted to a common type (e.g. float32 and float64 calcium to float64).
+
+    Args:
+        data_dir (Path | str): Path to the root data directory. May be an "s3://bucket/prefix" URI.
+        data_type (str): Type of data to load. Must be one of "events", "motion", "deconv_calcium", or "raw_calcium".
+        columns (list[str] | None): Columns to read from the files. Reads all columns if None.
+
+    Returns:
+        pd.DataFrame: DataFrame containing the data of all sessions, with mouse_name and session columns.
+
+    Raises:
+        ValueError: If data_type is not one of "events", "motion", "deconv_calcium", or "raw_calcium".
+        FileNotFoundError: If no files of data_type exist under data_dir.
+    """
+    try:
+        filename = FILENAMES[data_type]
+    except KeyError:
+        raise ValueError(f"Unknown data type {data_type}.")
+
+    if str(data_dir).startswith("s3://"):
+        filesystem = _s3_filesystem()
+        base_dir = str(data_dir).removeprefix("s3://").rstrip("/")
+    else:
+        filesystem = pyarrow.fs.LocalFileSystem()
+        base_dir = Path(data_dir).resolve().as_posix()
+
+    # session files sit at data_dir/mouse_name/session/filename
+    file_infos = filesystem.get_file_info(
+        pyarrow.fs.FileSelector(base_dir, recursive=True)
+    )
+    files = sorted(
+        info.path
+        for info in file_infos
+        if info.base_name == filename
+        and info.path.removeprefix(base_dir + "/").count("/") == 2
+    )
+    if not files:
+        raise FileNotFoundError(f"No {filename} files found in {data_dir}.")
+
+    partition_schema = pa.schema(
+        [("mouse_name", pa.string()), ("session", pa.string())]
+    )
+    file_format = pyarrow.dataset.ParquetFileFormat()
+    fragments = pyarrow.dataset.dataset(
+        files,
+        format=file_format,
+        filesystem=filesystem,
+        partitioning=pyarrow.dataset.DirectoryPartitioning(partition_schema),
+        partition_base_dir=base_dir,
+    ).get_fragments()
+
+    # footers are read in parallel and cached on the fragments, so the scan does not
+    # reopen them. permissive promotion widens types that differ between sessions, e.g.
+    # float32 and float64 calcium, and each file is cast to it as it is scanned
+    fragments = list(fragments)
+    with ThreadPoolExecutor() as executor:
+        schemas = list(executor.map(_fragment_schema, fragments))
+    schema = pa.unify_schemas(
+        schemas + [partition_schema], promote_options="permissive"
+    )
+    dataset = pyarrow.dataset.FileSystemDataset(
+        fragments, schema=schema, format=file_format, filesystem=filesystem
+    )
+
+    if columns is not None:
+        columns = list(columns) + [
+            col for col in partition_schema.names if col not in columns
+        ]
+    return dataset.to_table(columns=columns).to_pandas()
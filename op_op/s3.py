@@ -0,0 +1,40 @@
+import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+
+MAX_WORKERS = 8
+MAX_CONCURRENCY_PER_FILE = 8
+MULTIPART_SIZE = 8 * 1024 * 1024
+
+# files larger than MULTIPART_SIZE are downloaded as parallel byte-range parts and
+# uploaded as parallel multipart uploads
+TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=MULTIPART_SIZE,
+    multipart_chunksize=MULTIPART_SIZE,
+    max_concurrency=MAX_CONCURRENCY_PER_FILE,
+    use_threads=True,
+)
+
+
+def create_s3_client(region: str | None = None):
+    """
+    Create an S3 client for parallel transfers.
+
+    The client has one pooled connection per transfer thread, adaptive retries and TCP
+    keepalive. Low-level clients are thread safe, so one is shared by all threads.
+
+    Args:
+        region (str | None, optional): AWS region of the bucket. Defaults to None, which uses the region configured for boto3.
+
+    Returns:
+        S3.Client: The S3 client.
+    """
+    return boto3.session.Session().client(
+        "s3",
+        region_name=region,
+        config=Config(
+            max_pool_connections=MAX_WORKERS * MAX_CONCURRENCY_PER_FILE,
+            retries={"max_attempts": 10, "mode": "adaptive"},
+            tcp_keepalive=True,
+        ),
+    )
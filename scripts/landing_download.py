@@ -1,13 +1,18 @@
-import boto3
 import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import chain
 from pathlib import Path
 
+from op_op.s3 import MAX_WORKERS, TRANSFER_CONFIG, create_s3_client
+
 
 DATA_DIR = os.environ.get("DATA_DIR", "data")
 LANDING_PREFIX = os.environ.get("LANDING_PREFIX", "landing")
 S3_BUCKET = os.environ.get("S3_BUCKET_NAME")
 S3_REGION = os.environ.get("S3_BUCKET_REGION", "us-east-1")
 FILE_TYPE = ".csv"
+MAX_LIST_WORKERS = 16
 
 
 def construct_local_path(s3_key, local_root_dir):
@@ -15,37 +20,85 @@ def construct_local_path(s3_key, local_root_dir):
     Constructs a local file path from the S3 key.
     """
     local_path = Path(local_root_dir) / Path(s3_key)
-    local_path.parent.mkdir(parents=True, exist_ok=True)
+    _ensure_dir(str(local_path.parent))
     return local_path
 
 
+@lru_cache(maxsize=None)
+def _ensure_dir(path):
+    """
+    Create a directory and its parents once, as many keys share a directory.
+    """
+    Path(path).mkdir(parents=True, exist_ok=True)
+
+
 class S3BucketDownloader:
-    def __init__(self, bucket_name, prefix, file_format):
+    def __init__(self, bucket_name, prefix, file_format, s3_client=None):
         self.bucket_name = bucket_name
         self.prefix = prefix
         self.file_format = file_format
-        self.s3 = boto3.client("s3")
+        self.s3 = s3_client if s3_client is not None else create_s3_client()
 
     def list_files(self):
         """
         List all files in the bucket with the specified prefix and file format.
+
+        Subprefixes directly under the prefix (one per mouse) are listed in parallel, as
+        each listing is a serial chain of requests returning at most 1000 keys.
         """
-        response = self.s3.list_objects_v2(Bucket=self.bucket_name, Prefix=self.prefix)
-        all_files = response.get("Contents", [])
-        return [
-            file["Key"] for file in all_files if file["Key"].endswith(self.file_format)
-        ]
+        # an empty prefix lists from the bucket root, as keys never start with "/"
+        prefix = self.prefix.rstrip("/")
+        prefix = f"{prefix}/" if prefix else ""
+
+        paginator = self.s3.get_paginator("list_objects_v2")
+        pages = paginator.paginate(
+            Bucket=self.bucket_name, Prefix=prefix, Delimiter="/"
+        )
+        subprefixes = []
+        keys = []
+        for page in pages:
+            subprefixes.extend(p["Prefix"] for p in page.get("CommonPrefixes", []))
+            keys.extend(file["Key"] for file in page.get("Contents", []))
+
+        with ThreadPoolExecutor(max_workers=MAX_LIST_WORKERS) as executor:
+            keys.extend(
+                chain.from_iterable(executor.map(self._list_prefix, subprefixes))
+            )
+
+        return [key for key in keys if key.endswith(self.file_format)]
+
+    def _list_prefix(self, prefix):
+        """
+        List all keys in the bucket under a prefix.
+        """
+        paginator = self.s3.get_paginator("list_objects_v2")
+        pages = paginator.paginate(Bucket=self.bucket_name, Prefix=prefix)
+        return [file["Key"] for page in pages for file in page.get("Contents", [])]
 
     def download_files(self, download_path):
         """
         Download files from the S3 bucket, preserving the directory structure.
         """
         files = self.list_files()
-        for file_key in files:
-            local_file_path = construct_local_path(file_key, download_path)
-            self.s3.download_file(self.bucket_name, file_key, str(local_file_path))
+
+        # create local directories up front so worker threads do not race on mkdir
+        local_file_paths = [
+            construct_local_path(file_key, download_path) for file_key in files
+        ]
+
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            for _ in executor.map(self.download_file, files, local_file_paths):
+                pass
         print(f"Downloaded {len(files)} files to {download_path}")
 
+    def download_file(self, file_key, local_file_path):
+        """
+        Download a single file from the S3 bucket to a local path.
+        """
+        self.s3.download_file(
+            self.bucket_name, file_key, str(local_file_path), Config=TRANSFER_CONFIG
+        )
+
 
 def main():
     local_landing_dir = Path(DATA_DIR) / LANDING_PREFIX
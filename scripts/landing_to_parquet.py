@@ -1,36 +1,90 @@
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.dataset
+import pyarrow.parquet as pq
 import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
-from typing import List
+from typing import Iterator, List
 import numpy as np
 
 LANDING_DIR = Path(os.environ.get("DATA_DIR")) / os.environ.get("LANDING_PREFIX")
 RAW_DIR = Path(os.environ.get("DATA_DIR")) / os.environ.get("RAW_PREFIX")
-PARQUET_COMPRESSION = "snappy"
+PARQUET_COMPRESSION = "zstd"
+PARQUET_COMPRESSION_LEVEL = 3
+PARQUET_ROW_GROUP_SIZE = 500_000
+# calcium traces are stored as float32, halving file size and load bandwidth
+CA_DTYPE = np.float32
 OUTPUT_EVENTS_FILENAME = "events.parquet"
 OUTPUT_RAW_CA_FILENAME = "raw_calcium.parquet"
 OUTPUT_DECONV_CA_FILENAME = "deconv_calcium.parquet"
 OUTPUT_MOTION_FILENAME = "motion_tracking.parquet"
 
+# output event columns as expressions of the landing columns. nonzero and missing
+# flags are True, as with pandas astype(bool). trial indices fit in int32
+EVENT_COLUMNS = {
+    "trial_idx": pc.field("Trial").cast(pa.int32()),
+    "block_type": pc.field("Block"),
+    "was_omission": pc.coalesce(pc.field("omissionALL") != 0, True),
+    "was_forced_choice": pc.coalesce(pc.field("ForceFree") != 0, True),
+    "start_time": pc.field("TrialPossible"),
+    "mouse_init_time": pc.field("stTime"),
+    "screen_touch_time": pc.field("choiceTime"),
+    "reward_collection_time": pc.field("collectionTime"),
+    "chose_large": pc.coalesce(pc.field("bigSmall") == 1.2, False),
+    "was_shocked": pc.coalesce(pc.field("shock") != 0, True),
+}
+
+
+def iter_files(root: Path, suffix: str) -> Iterator[str]:
+    """
+    Recursively yield paths of files under root whose names end with suffix.
+
+    Uses os.scandir so directory entries are classified from the cached dirent type
+    rather than a stat call per file. Hidden directories such as .ipynb_checkpoints are
+    skipped.
+    """
+    stack = [os.fspath(root)]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if not entry.name.startswith("."):
+                        stack.append(entry.path)
+                elif entry.name.endswith(suffix):
+                    yield entry.path
+
 
 class FileProcessor:
+    # columns to write min/max statistics for, True for all columns
+    write_statistics: bool | list[str] = True
+
     def __init__(
         self,
         output_filename: str,
         source_filename: str,
-        compression: str = "snappy",
+        compression: str = "zstd",
+        compression_level: int | None = 3,
     ):
         self.compression = compression
+        self.compression_level = compression_level
         self.output_filename = output_filename
         self.source_filename = source_filename
 
     @staticmethod
-    def read_landing_file(file_path: Path) -> pd.DataFrame:
-        return pd.read_csv(file_path)
+    def read_landing_file(file_path: Path) -> pa.Table:
+        return pacsv.read_csv(
+            file_path,
+            read_options=pacsv.ReadOptions(use_threads=True),
+            parse_options=pacsv.ParseOptions(delimiter=","),
+        )
 
     @staticmethod
     def find_files(landing_dir: Path, source_filename: str) -> List[Path]:
-        return list(landing_dir.rglob(f"*{source_filename}"))
+        return [Path(path) for path in iter_files(landing_dir, source_filename)]
 
     @staticmethod
     def process_file(df: Path) -> pd.DataFrame:
@@ -64,105 +118,157 @@ class FileProcessor:
         raw_dir: Path,
     ) -> List[Path]:
         source_files = self.find_files(landing_dir, self.source_filename)
-        dest_files = []
-
-        for source_file in source_files:
-            output_path = self.get_output_path(
-                landing_dir=landing_dir,
-                raw_dir=raw_dir,
-                source_file=source_file,
-                output_filename=self.output_filename,
-            )
+        if not source_files:
+            return []
+
+        # files are independent and parsing holds the GIL, so use processes, capped at
+        # one per file to avoid holding more large calcium files in memory than needed
+        max_workers = min(os.cpu_count() or 1, len(source_files))
+        process_one = partial(
+            self._process_one, landing_dir=landing_dir, raw_dir=raw_dir
+        )
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            dest_files = list(executor.map(process_one, source_files))
+        return dest_files
 
-            df = self.read_landing_file(source_file)
-            df = self.process_df(df)
+    def _process_one(self, source_file: Path, landing_dir: Path, raw_dir: Path) -> Path:
+        output_path = self.get_output_path(
+            landing_dir=landing_dir,
+            raw_dir=raw_dir,
+            source_file=source_file,
+            output_filename=self.output_filename,
+        )
 
-            df.to_parquet(output_path, compression=self.compression, index=False)
-            dest_files.append(output_path)
-        return dest_files
+        df = self.read_landing_file(source_file)
+        df = self.process_df(df)
+
+        self.write_parquet(df, output_path)
+        return output_path
+
+    def write_parquet(self, data: pa.Table | pd.DataFrame, output_path: Path) -> None:
+        if isinstance(data, pd.DataFrame):
+            table = pa.Table.from_pandas(data, preserve_index=False)
+        else:
+            table = data
+
+        # dictionary encode repeated labels only, numeric columns gain nothing from it
+        dictionary_cols = [
+            field.name
+            for field in table.schema
+            if pa.types.is_string(field.type) or pa.types.is_dictionary(field.type)
+        ]
+        # splitting float bytes into streams lets zstd compress the slowly varying
+        # exponent bytes of traces together, shrinking files and their decode time
+        float_cols = [
+            field.name for field in table.schema if pa.types.is_floating(field.type)
+        ]
+        pq.write_table(
+            table,
+            output_path,
+            compression=self.compression,
+            compression_level=self.compression_level,
+            use_dictionary=dictionary_cols,
+            use_byte_stream_split=float_cols,
+            write_statistics=self.write_statistics,
+            row_group_size=PARQUET_ROW_GROUP_SIZE,
+        )
 
 
 class EventProcessor(FileProcessor):
     def __init__(
         self,
-        compression: str = "snappy",
+        compression: str = "zstd",
+        compression_level: int | None = 3,
         source_filename: str = "events.csv",
         output_filename="events.parquet",
     ):
         super().__init__(
             compression=compression,
+            compression_level=compression_level,
             source_filename=source_filename,
             output_filename=output_filename,
         )
 
     @staticmethod
-    def process_df(df: pd.DataFrame) -> pd.DataFrame:
-        cols = [
-            "trial_idx",
-            "block_type",
-            "was_omission",
-            "was_forced_choice",
-            "start_time",
-            "mouse_init_time",
-            "screen_touch_time",
-            "reward_collection_time",
-            "chose_large",
-            "was_shocked",
-        ]
-
-        df1 = (
-            df.rename(
-                columns=dict(
-                    Trial="trial_idx",
-                    Block="block_type",
-                    omissionALL="was_omission",
-                    ForceFree="was_forced_choice",
-                    TrialPossible="start_time",
-                    stTime="mouse_init_time",
-                    choiceTime="screen_touch_time",
-                    collectionTime="reward_collection_time",
-                    bigSmall="chose_large",
-                    shock="was_shocked",
-                )
-            )
-            .assign(
-                was_omission=lambda x: x.was_omission.astype(bool),
-                was_forced_choice=lambda x: x.was_forced_choice.astype(bool),
-                chose_large=lambda x: x.chose_large == 1.2,
-                was_shocked=lambda x: x.was_shocked.astype(bool),
-            )
-            .loc[:, cols]
-            .copy()
+    def process_df(table: pa.Table) -> pa.Table:
+        # renames, flag casts and column selection run as one projection over the table
+        table = pyarrow.dataset.dataset(table).to_table(columns=EVENT_COLUMNS)
+
+        # few distinct block types. labels are stored once each and load as a
+        # categorical, integer codes fit in int32
+        block_type = table["block_type"]
+        if pa.types.is_integer(block_type.type):
+            block_type = block_type.cast(pa.int32())
+        else:
+            block_type = pc.dictionary_encode(block_type).combine_chunks()
+        return table.set_column(
+            table.schema.get_field_index("block_type"), "block_type", block_type
         )
-        return df1
 
 
 class CaProcessor(FileProcessor):
+    # statistics on every neuron column cost write time and are never used to filter
+    write_statistics = ["time"]
+
     @staticmethod
-    def read_landing_file(file_path: Path) -> pd.DataFrame:
-        df = pd.read_csv(file_path, header=None)
-        df = df.transpose()
-        return df
+    def read_landing_file(file_path: Path) -> np.ndarray:
+        # landing files hold one neuron per line, so each line is parsed straight into
+        # a column of a time x neuron array instead of reading the file and transposing
+        with open(file_path, "rb") as f:
+            # shorter traces are padded with NaN, as pd.read_csv does for ragged rows
+            n_samples = [line.count(b",") + 1 for line in f if line.strip()]
+            if not n_samples:
+                raise ValueError(f"No calcium traces found in {file_path}.")
+            f.seek(0)
+            lines = (line for line in f if line.strip())
+
+            ca = np.full(
+                (max(n_samples), len(n_samples)), np.nan, dtype=CA_DTYPE, order="F"
+            )
+            for i, line in enumerate(lines):
+                try:
+                    trace = CaProcessor.parse_trace(line)
+                except pa.ArrowInvalid as e:
+                    raise ValueError(
+                        f"Could not parse trace of neuron {i} in {file_path}: {e}"
+                    ) from e
+                ca[: len(trace), i] = trace
+
+        return ca
 
     @staticmethod
-    def process_df(df: pd.DataFrame) -> pd.DataFrame:
-        neuron_cols = [f"n{i}" for i in range(len(df.columns))]
-        df.columns = neuron_cols
+    def parse_trace(line: bytes) -> np.ndarray:
+        # one value per row, so the csv parser reads empty and NA fields as NaN
+        table = pacsv.read_csv(
+            pa.py_buffer(line.replace(b",", b"\n")),
+            read_options=pacsv.ReadOptions(column_names=["trace"]),
+            parse_options=pacsv.ParseOptions(ignore_empty_lines=False),
+            convert_options=pacsv.ConvertOptions(
+                column_types={"trace": pa.from_numpy_dtype(CA_DTYPE)}
+            ),
+        )
+        return table["trace"].to_numpy(zero_copy_only=False)
 
-        df["time"] = np.arange(len(df)) * 0.1
-        df = df[["time"] + neuron_cols]
-        return df
+    @staticmethod
+    def process_df(ca: np.ndarray) -> pa.Table:
+        # Fortran order makes each neuron contiguous, so its arrow column wraps the
+        # array without a copy
+        columns = {"time": pa.array(np.arange(len(ca)) * 0.1)}
+        columns.update({f"n{i}": pa.array(ca[:, i]) for i in range(ca.shape[1])})
+        return pa.table(columns)
 
 
 class DeconvCaProcessor(CaProcessor):
     def __init__(
         self,
-        compression: str = "snappy",
+        compression: str = "zstd",
+        compression_level: int | None = 3,
         source_filename: str = "deconv_calcium.csv",
         output_filename="deconv_calcium.parquet",
     ):
         super().__init__(
             compression=compression,
+            compression_level=compression_level,
             source_filename=source_filename,
             output_filename=output_filename,
         )
@@ -171,12 +277,14 @@ class DeconvCaProcessor(CaProcessor):
 class RawCaProcessor(DeconvCaProcessor):
     def __init__(
         self,
-        compression: str = "snappy",
+        compression: str = "zstd",
+        compression_level: int | None = 3,
         source_filename: str = "raw_calcium.csv",
         output_filename="raw_calcium.parquet",
     ):
         super().__init__(
             compression=compression,
+            compression_level=compression_level,
             source_filename=source_filename,
             output_filename=output_filename,
         )
@@ -185,16 +293,22 @@ class RawCaProcessor(DeconvCaProcessor):
 class MotionProcessor(FileProcessor):
     def __init__(
         self,
-        compression: str = "snappy",
+        compression: str = "zstd",
+        compression_level: int | None = 3,
         source_filename: str = "motion_tracking.csv",
         output_filename="motion_tracking.parquet",
     ):
         super().__init__(
             compression=compression,
+            compression_level=compression_level,
             source_filename=source_filename,
             output_filename=output_filename,
         )
 
+    @staticmethod
+    def read_landing_file(file_path: Path) -> pd.DataFrame:
+        return FileProcessor.read_landing_file(file_path).to_pandas()
+
     @staticmethod
     def rename_cols(df: pd.DataFrame) -> pd.DataFrame:
         return df.rename(
@@ -213,34 +327,39 @@ class MotionProcessor(FileProcessor):
         time_col: str = "time",
         created_velocity_col="velocity",
     ) -> pd.DataFrame:
-        df_sorted = df.sort_values(by=time_col)
+        order = np.argsort(df[time_col].to_numpy(), kind="stable")
+        df_sorted = df.take(order)
 
-        dx = df_sorted[x_col].diff()
-        dy = df_sorted[y_col].diff()
+        # on the raw arrays, with hypot fusing the squares, sum and root into one pass
+        dx = np.diff(df_sorted[x_col].to_numpy(), prepend=np.nan)
+        dy = np.diff(df_sorted[y_col].to_numpy(), prepend=np.nan)
+        dt = np.diff(df_sorted[time_col].to_numpy(), prepend=np.nan)
 
-        dt = df_sorted[time_col].diff()
-
-        vx = dx / dt
-        vy = dy / dt
-
-        df_sorted[created_velocity_col] = np.sqrt(vx**2 + vy**2)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            df_sorted[created_velocity_col] = np.hypot(dx, dy) / dt
 
         return df_sorted
 
     def select_cols(self, df: pd.DataFrame) -> pd.DataFrame:
         return df[["frame_idx", "time", "x", "y", "velocity"]]
 
+    @staticmethod
+    def narrow_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+        return df.astype({"frame_idx": np.int32})
+
     def process_df(self, df: pd.DataFrame) -> pd.DataFrame:
         df1 = self.rename_cols(df)
         df1 = self.round_rime(df1)
         df2 = self.add_velocity(df1)
         df3 = self.select_cols(df2)
-        return df3
+        df4 = self.narrow_dtypes(df3)
+        return df4
 
 
 def process_events(input_dir, output_dir) -> List[Path]:
     event_processor = EventProcessor(
         compression=PARQUET_COMPRESSION,
+        compression_level=PARQUET_COMPRESSION_LEVEL,
         output_filename=OUTPUT_EVENTS_FILENAME,
     )
     processed_event_paths = event_processor.process_files(
@@ -253,6 +372,7 @@ def process_events(input_dir, output_dir) -> List[Path]:
 def process_deconv_calcium(input_dir, output_dir) -> List[Path]:
     deconv_calcium_processor = DeconvCaProcessor(
         compression=PARQUET_COMPRESSION,
+        compression_level=PARQUET_COMPRESSION_LEVEL,
         output_filename=OUTPUT_DECONV_CA_FILENAME,
     )
 
@@ -266,6 +386,7 @@ def process_deconv_calcium(input_dir, output_dir) -> List[Path]:
 def process_raw_calcium(input_dir, output_dir) -> List[Path]:
     raw_calcium_processor = RawCaProcessor(
         compression=PARQUET_COMPRESSION,
+        compression_level=PARQUET_COMPRESSION_LEVEL,
         output_filename=OUTPUT_RAW_CA_FILENAME,
     )
     processed_raw_calcium_paths = raw_calcium_processor.process_files(
@@ -278,6 +399,7 @@ def process_raw_calcium(input_dir, output_dir) -> List[Path]:
 def process_motion_tracking(input_dir, output_dir) -> List[Path]:
     motion_processor = MotionProcessor(
         compression=PARQUET_COMPRESSION,
+        compression_level=PARQUET_COMPRESSION_LEVEL,
         output_filename=OUTPUT_MOTION_FILENAME,
     )
     processed_motion_paths = motion_processor.process_files(
@@ -1,8 +1,10 @@
 import os
-import boto3
 from botocore.exceptions import NoCredentialsError
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+from op_op.s3 import MAX_WORKERS, TRANSFER_CONFIG, create_s3_client
+
 DATA_DIR = os.environ.get("DATA_DIR", "data")
 LANDING_PREFIX = os.environ.get("LANDING_PREFIX", "landing")
 RAW_PREFIX = os.environ.get("RAW_PREFIX", "raw")
@@ -12,27 +14,39 @@ FILE_TYPE = ".parquet"
 
 
 class S3Uploader:
-    def __init__(self, input_dir, bucket, prefix, file_format):
+    def __init__(self, input_dir, bucket, prefix, file_format, s3_client=None):
         self.input_dir = input_dir
         self.bucket = bucket
         self.prefix = prefix.strip("/")
         self.file_format = file_format
-        self.s3 = boto3.client("s3", region_name=S3_REGION)
+        self.s3 = s3_client if s3_client is not None else create_s3_client(S3_REGION)
 
-    def upload_files(self):
+    def _enumerate(self):
         for root, dirs, files in os.walk(self.input_dir):
             for file in files:
                 if file.endswith(self.file_format):
                     local_path = os.path.join(root, file)
                     relative_path = os.path.relpath(local_path, self.input_dir)
                     s3_path = f"{self.prefix}/{relative_path}".replace("\\", "/")
+                    yield local_path, s3_path
 
-                    try:
-                        self.s3.upload_file(local_path, self.bucket, s3_path)
-                        print(f"Uploaded {local_path} to s3://{self.bucket}/{s3_path}")
-                    except NoCredentialsError:
-                        print("Credentials not available")
-                        return
+    def _upload_one(self, paths):
+        local_path, s3_path = paths
+        self.s3.upload_file(local_path, self.bucket, s3_path, Config=TRANSFER_CONFIG)
+        print(f"Uploaded {local_path} to s3://{self.bucket}/{s3_path}")
+
+    def upload_files(self):
+        # check credentials once before starting, rather than failing mid-batch
+        try:
+            self.s3.head_bucket(Bucket=self.bucket)
+        except NoCredentialsError:
+            print("Credentials not available")
+            return
+
+        paths = list(self._enumerate())
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            for _ in executor.map(self._upload_one, paths):
+                pass
 
 
 def main():